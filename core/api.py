@@ -1,7 +1,7 @@
 import traceback
 from collections import defaultdict, namedtuple
 from collections.abc import Iterable
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
 from itertools import count, product
 from pathlib import Path
 from pprint import pformat
@@ -173,12 +173,18 @@ def equivalence_check(input_program: Path, conversions: tuple[Conversion, ...],
 
 def run_validation(validation_groups: Iterable[ValidationGroup], /, *, test_only: bool, n_jobs: int) -> None:
 
-    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
-        futures = [
-            executor.submit(equivalence_check, vg.input_program, vg.conversions, test_only) for vg in validation_groups
-        ]
-        for _ in tqdm(as_completed(futures), desc='Validation progress', total=len(futures)):
-            pass
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor, tqdm(desc='Validation progress') as progress:
+        # NOTE: keep a bounded window of in-flight jobs; the first workers start while
+        # sampling is still running, and the sampled groups never all sit in memory
+        pending = set()
+        for vg in validation_groups:
+            pending.add(executor.submit(equivalence_check, vg.input_program, vg.conversions, test_only))
+            if len(pending) >= n_jobs * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                progress.update(len(done))
+
+        done, _ = wait(pending)
+        progress.update(len(done))
 
 
 def mutate(seed_path: Path, output_dir: Path, max_cnt: int) -> None:
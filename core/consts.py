@@ -371,9 +371,23 @@ LL_DEBUG_INFO = re.compile(r'!\d+ = !DIDerivedType\('
                            r'(, align: (?P<align>\d+))?'
                            r'(, offset: (?P<offset>\d+))?'
                            r'(, flags: DIFlagPublic)?\)\n')
-LL_FILENAME = re.compile(r'!\d+ = !DIFile\('
-                         r'filename: "./V(?P<top_module>\w+)___024root.h", '
-                         r'directory: "[\w/]+"\)\n')
+
+# The DIFile | DIDerivedType alternation combined into one bytes pattern, so a whole
+# `.ll` file can be scanned with a single finditer() pass instead of two match()
+# calls per line. A filename record sets 'top_module'; a debug-info record sets 'name'.
+LL_METADATA = re.compile(
+    rb'^!\d+ = !(?:DIFile\('
+    rb'filename: "./V(?P<top_module>\w+)___024root.h", '
+    rb'directory: "[\w/]+"\)'
+    rb'|DIDerivedType\('
+    rb'tag: DW_TAG_member, '
+    rb'name: "(?P<name>\w+)", '
+    rb'scope: !\d+, file: !\d+, '
+    rb'line: \d+, baseType: !\d+, '
+    rb'size: (?P<size>\d+)'
+    rb'(, align: (?P<align>\d+))?'
+    rb'(, offset: (?P<offset>\d+))?'
+    rb'(, flags: DIFlagPublic)?\))$', re.MULTILINE)
 
 # ----------------------------------------------- Test harness settings ---------------------------------------------- #
 
@@ -264,6 +264,23 @@ class VerilatorCppCrossbar(Crossbar):
         # Besides, it directly matches the name of the leaf node.
         yield from model.match_path(tokens)
 
+    @classmethod
+    def from_data_batch(cls, names: Iterable[str], model) -> dict[str, Crossbar]:
+        """Create crossbars for many names at once.
+
+        `from_data` re-walks the model for every name, which is O(names x model);
+        here the model is indexed once and shared by all lookups."""
+
+        tokens_by_name = dict()
+        for name in names:
+            tokens = tuple(cls._tokenize(name))
+            if len(tokens) == 1:  # port of the top module
+                tokens = (model.top_module(), *tokens)
+            tokens_by_name[name] = tokens
+
+        paths_by_tokens = model.match_paths(set(tokens_by_name.values()))
+        return {name: cls(*paths_by_tokens[tokens]) for name, tokens in tokens_by_name.items()}
+
 
 class YosysCxxCrossbar(VerilatorCppCrossbar):
 
@@ -150,3 +150,31 @@ class ModelTreeView:
         for n in candidates:
             if n.tag == leaf_module and n.data.find_decl(item_name):
                 yield HierarchicalPathName(n.identifier, item_name)
+
+    def match_paths(self, token_groups) -> dict[tuple, list[HierarchicalPathName]]:
+        """Batched form of `match_path`: resolve many token sequences in one go.
+
+        The per-tag node index is built a single time and shared by all matches,
+        instead of rescanning every node of the tree for each sequence.
+        Returns a dict mapping each token tuple to its matched paths."""
+
+        by_tag = dict()
+        for node in self._tree.all_nodes_itr():
+            by_tag.setdefault(node.tag, []).append(node)
+
+        result = dict()
+        for tokens in token_groups:
+            *heads, leaf_module, item_name = tokens
+
+            if heads:
+                candidates = (c for n in by_tag.get(heads[0], ()) for c in self._tree.children(n.identifier))
+                for h in heads[1:]:
+                    candidates = [c for n in candidates if n.tag == h for c in self._tree.children(n.identifier)]
+                candidates = (n for n in candidates if n.tag == leaf_module)
+            else:
+                candidates = by_tag.get(leaf_module, ())
+
+            result[tuple(tokens)] = [
+                HierarchicalPathName(n.identifier, item_name) for n in candidates if n.data.find_decl(item_name)
+            ]
+        return result
@@ -3,11 +3,13 @@ import traceback
 from collections import defaultdict
 from dataclasses import dataclass
 from functools import reduce
+from hashlib import blake2b
+from heapq import nlargest
 from itertools import chain, combinations, pairwise, product, zip_longest
 from math import ceil, log10
-from operator import add, mul
+from operator import mul
 from pathlib import Path
-from random import choice, choices, randint, random, sample, shuffle
+from random import Random, random
 from string import ascii_letters
 from typing import Iterable
 
@@ -25,6 +27,9 @@ from core.consts import (ALL_DECLARED_IDENTIFIERS, ALL_ESCAPED_IDENTIFIERS, ALL_
 from core.mutators.mutator import MutationError, MutationOperator
 from core.workspace import get_workspace
 
+# A private generator avoids the lock around the module-level functions in `random`
+_rng = Random()
+
 
 @dataclass
 class Replacement:
@@ -57,8 +62,10 @@ class ByteCoverage:
         # Insert "True" in between the "remainders"
         insertions = ([True] * (r.end_byte - r.start_byte) for r in replacements)
 
-        self.covered_bytes = reduce(lambda x, y: x + y,
-                                    chain.from_iterable(zip_longest(remainders, insertions, fillvalue=[])))
+        # NOTE: a single flattening pass runs in linear time, whereas repeated
+        # list concatenation would copy the accumulated prefix on every step
+        self.covered_bytes = list(chain.from_iterable(chain.from_iterable(zip_longest(remainders, insertions,
+                                                                                     fillvalue=[]))))
         return self.covered_bytes.count(True) / len(self.covered_bytes)
 
 
@@ -101,7 +108,9 @@ class BytesEditor:
         # Insert "insertions" in between the "remainders"
         insertions = (r.substitute for r in self.replacements)
 
-        new_data = reduce(lambda x, y: x + y, chain.from_iterable(zip_longest(remainders, insertions, fillvalue=b'')))
+        # NOTE: join() allocates the result once instead of copying the
+        # accumulated prefix for every replacement
+        new_data = b''.join(chain.from_iterable(zip_longest(remainders, insertions, fillvalue=b'')))
         new_end_byte = self.end_byte + (len(new_data) - len(self.data))
 
         # Update data and end_byte
@@ -129,6 +138,39 @@ class CandidateMutant:
         return parser.parse(editor.data)
 
 
+class CandidatePool:
+    """Holds candidate mutants of one sub-mutator in a structure-of-arrays layout:
+    `items` and `scores` are parallel lists, so the score of `items[i]` is `scores[i]`.
+    Scores depend on the evolving byte coverage, so they are recomputed in bulk via
+    `refresh()` once per selection round instead of per sorting/truncation call."""
+
+    def __init__(self) -> None:
+        self.items: list[CandidateMutant] = list()
+        self.scores: list[float] = list()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def extend(self, candidates: Iterable['CandidateMutant']) -> None:
+        for candidate in candidates:
+            self.items.append(candidate)
+            self.scores.append(candidate.score)
+
+    def refresh(self) -> None:
+        """Re-evaluate all scores against the current byte coverage."""
+        self.scores = [item.score for item in self.items]
+
+    def merge(self, other: 'CandidatePool') -> None:
+        self.items.extend(other.items)
+        self.scores.extend(other.scores)
+
+    def truncate(self, expected: int) -> None:
+        """Keep only the `expected` candidates with the highest scores."""
+        chosen = nlargest(expected, range(len(self.items)), key=self.scores.__getitem__)
+        self.items = [self.items[i] for i in chosen]
+        self.scores = [self.scores[i] for i in chosen]
+
+
 def pattern_match(pattern: str,
                   root_node: Node,
                   start_byte: int | None = None,
@@ -305,7 +347,7 @@ def _shape_of(id_as_bytes: bytes, module_node: Node) -> tuple[int, int]:
 
 def _random_id(length: int = 5) -> str:
     """Randomly generate an identifier for a variable created during mutation."""
-    return '_' + ''.join(choices(ascii_letters, k=length))
+    return '_' + ''.join(_rng.choices(ascii_letters, k=length))
 
 
 class BaseMutator:
@@ -337,7 +379,7 @@ class ChangeUnaryOp(BaseMutator):
             yield (
                 # Replace the old unary operator with a randomly chosen new unary operator
                 Replacement(uop_node.start_byte, uop_node.end_byte,
-                            choice(UNARY_OPERATORS).encode()),
+                            _rng.choice(UNARY_OPERATORS).encode()),
                 # Add a pair of parentheses
                 Replacement(expr_node.start_byte, expr_node.start_byte, b'('),
                 Replacement(expr_node.end_byte, expr_node.end_byte, b')'))
@@ -350,13 +392,13 @@ class ChangeBinaryOp(BaseMutator):
             bop_node = bop_match['bop']
             assert isinstance(bop_node, Node)
             # Replace the old binary operator with a randomly chosen new binary operator
-            yield (Replacement(bop_node.start_byte, bop_node.end_byte, choice(BINARY_OPERATORS).encode()), )
+            yield (Replacement(bop_node.start_byte, bop_node.end_byte, _rng.choice(BINARY_OPERATORS).encode()), )
 
 
 class DuplicateExpr(BaseMutator):
 
     def make_inserted(self, operand: str) -> bytes:
-        return f'({operand} {choice(BINARY_OPERATORS)} {operand})'.encode()
+        return f'({operand} {_rng.choice(BINARY_OPERATORS)} {operand})'.encode()
 
     def mutate_plans(self) -> Iterable[tuple[Replacement, ...]]:
         for expr_match in pattern_match(RHS_EXPRESSIONS, self.tree.root_node):
@@ -366,7 +408,7 @@ class DuplicateExpr(BaseMutator):
             if sub_exprs := [
                     n for m in pattern_match(ALL_EXPRESSIONS, outer_expr) if isinstance((n := m['expr']), Node)
             ]:
-                expr_node = choice(sub_exprs)
+                expr_node = _rng.choice(sub_exprs)
                 yield (Replacement(expr_node.start_byte, expr_node.end_byte,
                                    self.make_inserted(expr_node.text.decode())), )
 
@@ -422,7 +464,7 @@ class MakeLoopGenerate(BaseMutator):
 class DuplicateCond1(BaseMutator):
 
     def combine_two_cond(self, cond_a: Node, cond_b: Node) -> bytes:
-        return f'{cond_a.text.decode()} {choice(BINARY_OPERATORS)} {cond_b.text.decode()}'.encode()
+        return f'{cond_a.text.decode()} {_rng.choice(BINARY_OPERATORS)} {cond_b.text.decode()}'.encode()
 
     def mutate_plans(self) -> Iterable[tuple[Replacement, ...]]:
         for module_match in pattern_match(ALL_MODULE_DECLARATIONS, self.tree.root_node):
@@ -614,7 +656,7 @@ class RedundantAssignment(BaseMutator):
 
             try:
                 # Decide index value
-                index = choice(_range_of(lvalue_node.text, _parent_of(lvalue_node, self.tree)))
+                index = _rng.choice(_range_of(lvalue_node.text, _parent_of(lvalue_node, self.tree)))
             except NotImplementedError:
                 continue
 
@@ -648,17 +690,18 @@ class MakeArray(BaseMutator):
     def partial_ref(self, identifier: bytes, shape: list[int]) -> bytes:
         all_references = [(identifier.decode() + '[' + ']['.join(map(str, indices)) + ']')
                           for indices in product(*(range(s) for s in shape))]
-        return ('{' + ",".join(choices(all_references, k=randint(1, reduce(mul, shape)))) + '}').encode()
+        return ('{' + ",".join(_rng.choices(all_references, k=_rng.randint(1, reduce(mul, shape)))) + '}').encode()
 
     def complete_ref(self, identifier: bytes, shape: list[int]) -> bytes:
         all_references = [(identifier.decode() + '[' + ']['.join(map(str, indices)) + ']')
                           for indices in product(*(range(s + 1) for s in shape))]
-        shuffle(all_references)
+        _rng.shuffle(all_references)
         return ('{' + ",".join(all_references) + '}').encode()
 
     def make_declaration_suffix(self, shape: list[int]) -> bytes:
         # Decide the range of this dimension : [start:end]
-        return ''.join(f'[{start}:{end}]' for start, end in (choice([(0, size), (size, 0)]) for size in shape)).encode()
+        # NOTE: %-formatting on bytes avoids building an intermediate str just to encode it
+        return b''.join(b'[%d:%d]' % ((0, size) if _rng.getrandbits(1) else (size, 0)) for size in shape)
 
     def mutate_plans(self) -> Iterable[tuple[Replacement, ...]]:
         # Randomly choose an identifier and its decl_assignment block from the content
@@ -673,7 +716,7 @@ class MakeArray(BaseMutator):
                 continue
 
             # Decide the shape of the generated array
-            shape = [randint(2, 5) for _ in range(randint(1, 2))]
+            shape = [_rng.randint(2, 5) for _ in range(_rng.randint(1, 2))]
 
             yield (
                 # Replace the declaration: id => id[...]
@@ -685,25 +728,25 @@ class MakeArray(BaseMutator):
 class MakeFunction(BaseMutator):
     """Turn an expression into a function definition & insert subroutine calls."""
 
-    def replaceable_exprs(self, module_node: Node) -> list[Node]:
+    def replaceable_exprs(self, module_node: Node, rhs_matches: list[dict]) -> list[Node]:
         """Find all expressions (may be overlapped) in this module."""
         search_space = chain(
-            (n for m in pattern_match(RHS_EXPRESSIONS, module_node) if isinstance((n := m['expr']), Node)),
+            (n for m in rhs_matches if isinstance((n := m['expr']), Node)),
             (n for m in pattern_match(COND_STATEMENT_1 + COND_STATEMENT_2, module_node)
              if isinstance((n := m['if']), Node)))
         return [
             n for s in search_space for m in pattern_match(ALL_EXPRESSIONS, s) if isinstance((n := m['expr']), Node)
         ]
 
-    def choose_arguments(self, parameter_count: int, replaceable_exprs: list[Node]) -> str:
-        return ', '.join(f'({arg.text.decode()})' for arg in choices(replaceable_exprs, k=parameter_count))
+    def choose_arguments(self, parameter_count: int, replaceable_exprs: list[Node]) -> bytes:
+        return b', '.join(b'(%b)' % arg.text for arg in _rng.choices(replaceable_exprs, k=parameter_count))
 
-    def make_func_call(self, function_name: str, arguments: str) -> str:
-        return f'{function_name}({arguments})'
+    def make_func_call(self, function_name: str, arguments: bytes) -> bytes:
+        return b'%b(%b)' % (function_name.encode(), arguments)
 
     def to_be_replaced(self, replaceable_exprs: list[Node], number: int) -> list[Node]:
         # Replace some of these expressions with the generated function call
-        exprs_to_be_replaced = sample(replaceable_exprs, k=number)
+        exprs_to_be_replaced = _rng.sample(replaceable_exprs, k=number)
         min_start_byte = 0
         # NOTE: These expressions must be non-overlapped
         for node in sorted(exprs_to_be_replaced, key=lambda n: n.start_byte):
@@ -716,17 +759,17 @@ class MakeFunction(BaseMutator):
     def make_replacements(self, function_name: str, parameter_count: int,
                           replaceable_exprs: list[Node]) -> Iterable[Replacement]:
         max_replacements = ceil(log10(len(replaceable_exprs))) + 1  # NOTE: restrict the number of function call
-        for expr in self.to_be_replaced(replaceable_exprs, randint(1, max_replacements)):
+        for expr in self.to_be_replaced(replaceable_exprs, _rng.randint(1, max_replacements)):
             yield Replacement(
                 expr.start_byte, expr.end_byte,
-                self.make_func_call(function_name, self.choose_arguments(parameter_count, replaceable_exprs)).encode())
+                self.make_func_call(function_name, self.choose_arguments(parameter_count, replaceable_exprs)))
 
-    def make_func_decl(self, module_node: Node, function_name: str) -> tuple[str, int] | None:
+    def make_func_decl(self, module_node: Node, function_name: str,
+                       all_rhs_exprs: list[dict]) -> tuple[str, int] | None:
         # For all existing right-hand-side expressions in the same module
-        all_rhs_exprs = list(pattern_match(RHS_EXPRESSIONS, module_node))
         if all_rhs_exprs:
             # Select one as the function body
-            func_body = choice(all_rhs_exprs)['expr']
+            func_body = _rng.choice(all_rhs_exprs)['expr']
             assert isinstance(func_body, Node)
 
             # Find all identifiers in the expression
@@ -753,8 +796,11 @@ class MakeFunction(BaseMutator):
             func_location = _decl_insert_location(module_node)
 
             function_name = _random_id()
-            replaceable_exprs = self.replaceable_exprs(module_node)
-            if replaceable_exprs and (pair := self.make_func_decl(module_node, function_name)):
+            # Scan the module for right-hand-side expressions only once;
+            # both helpers below share the matches
+            rhs_matches = list(pattern_match(RHS_EXPRESSIONS, module_node))
+            replaceable_exprs = self.replaceable_exprs(module_node, rhs_matches)
+            if replaceable_exprs and (pair := self.make_func_decl(module_node, function_name, rhs_matches)):
                 func_decl, parameter_count = pair
                 yield (
                     # Insert the function declaration
@@ -773,7 +819,7 @@ class DuplicateModule(BaseMutator):
         instantiations = list(
             pattern_match(ALL_MODULE_INSTANTIATIONS.format(identifier=old_name.decode()), self.tree.root_node))
         if (inst_cnt := len(instantiations)) >= 2:
-            for inst_match in sample(instantiations, k=randint(1, inst_cnt - 1)):
+            for inst_match in _rng.sample(instantiations, k=_rng.randint(1, inst_cnt - 1)):
                 name_node = inst_match['module_name']
                 assert isinstance(name_node, Node)
                 yield Replacement(name_node.start_byte, name_node.end_byte, new_name)
@@ -855,8 +901,8 @@ class HeuristicMutator(MutationOperator):
             (LoopAssignment, 2, 5),
         )
 
-    def candidates_of(self, ast: Tree, cov: ByteCoverage) -> dict[type[BaseMutator], list[CandidateMutant]]:
-        candidates = defaultdict(list)
+    def candidates_of(self, ast: Tree, cov: ByteCoverage) -> dict[type[BaseMutator], CandidatePool]:
+        candidates = defaultdict(CandidatePool)
         workspace = get_workspace()
         # Collect mutation candidates for each sub-mutator
         for m in self.sub_mutators:
@@ -871,25 +917,46 @@ class HeuristicMutator(MutationOperator):
     def generate(self, seed_path: Path, number: int) -> Iterable[bytes]:
         MAX_NUM = number * 3
 
+        # Derive this generator's seed from the module-level stream, so the
+        # random.seed() call made for a fixed --seed still reproduces runs
+        _rng.seed(random())
+
         seed = seed_path.read_bytes()
         seed_ast = parser.parse(seed)
 
         # Initialization: Collect all candidates for current seed
         candidates = self.candidates_of(seed_ast, ByteCoverage(0, len(seed)))
 
+        yielded = set()  # digests of the mutants already produced
+
         for _ in range(number):
-            mutants_by_priority = sorted(chain(*candidates.values()), key=lambda c: c.score, reverse=True)
+            # Every realize() updates the shared byte coverage, so bring the pooled
+            # scores up to date once per round before ranking
+            for pool in candidates.values():
+                pool.refresh()
+
+            # Sort all (score, mutant) pairs by the precomputed scores
+            mutants_by_priority = sorted(chain.from_iterable(
+                zip(pool.scores, pool.items) for pool in candidates.values()),
+                                         key=lambda pair: pair[0],
+                                         reverse=True)
 
             while mutants_by_priority:
                 # Selection: (1) Mutator + Location with the highest priority
                 #            (2) Randomly choose a pair from the queue
-                chosen = 0 if random() < RANDOM_SELECTION_RATE else randint(0, len(mutants_by_priority) - 1)
-                next_mutant = mutants_by_priority.pop(chosen)
+                chosen = 0 if _rng.random() < RANDOM_SELECTION_RATE else _rng.randrange(len(mutants_by_priority))
+                _, next_mutant = mutants_by_priority.pop(chosen)
 
                 # Mutation: Try to realize the candidate mutant.
                 mutant_ast = next_mutant.realize()
 
-                if self.__class__.validate(mutant_ast.text, seed_path.suffix):
+                # Different candidates may realize byte-identical sources;
+                # producing the same mutant twice would only waste testing time downstream
+                if (digest := blake2b(mutant_ast.text, digest_size=16).digest()) in yielded:
+                    continue
+
+                if self.validate_once(mutant_ast.text, seed_path.suffix):
+                    yielded.add(digest)
                     yield mutant_ast.text
                     # NOTE: At this point, the content has just been validated.
                     # Therefore, any "ERROR" node found in the tree indicates problems of the parser.
@@ -898,12 +965,11 @@ class HeuristicMutator(MutationOperator):
                         self.has_error = True
                     else:
                         # Propagation: If succeeded, put the mutant's descendants into "candidates".
-                        for mutator_type, mutants in self.candidates_of(mutant_ast, next_mutant.cov).items():
-                            candidates[mutator_type].extend(mutants)
+                        for mutator_type, pool in self.candidates_of(mutant_ast, next_mutant.cov).items():
+                            candidates[mutator_type].merge(pool)
                         # Drop some mutants randomly if too many of them were generated
-                        mutant_cnt = reduce(add, (len(l) for l in candidates.values()))
-                        for mutator_type, mutants in candidates.items():
-                            if (expected := int(min(MAX_NUM, mutant_cnt) * mutator_type.percentage)) < len(mutants):
-                                candidates[mutator_type] = sorted(mutants, key=lambda c: c.score,
-                                                                  reverse=True)[:expected]
+                        mutant_cnt = sum(len(pool) for pool in candidates.values())
+                        for mutator_type, pool in candidates.items():
+                            if (expected := int(min(MAX_NUM, mutant_cnt) * mutator_type.percentage)) < len(pool):
+                                pool.truncate(expected)
                     break
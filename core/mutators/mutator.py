@@ -1,3 +1,4 @@
+from hashlib import blake2b
 from pathlib import Path
 from typing import Iterable
 
@@ -18,6 +19,18 @@ class MutationOperator:
 
     def __init__(self) -> None:
         self.has_error = False
+        # digest of the source -> result of semantic_check()
+        self._validated: dict[bytes, bool] = dict()
+
+    def validate_once(self, src: bytes, suffix: str) -> bool:
+        """Same as `validate()`, but identical sources are only checked once.
+
+        Mutations frequently regenerate byte-identical sources (e.g. two
+        replacements that cancel out), and each check spawns a subprocess."""
+        digest = blake2b(src, digest_size=16).digest()
+        if (validity := self._validated.get(digest)) is None:
+            validity = self._validated[digest] = self.__class__.validate(src, suffix)
+        return validity
 
     def generate(self, seed_path: Path, number: int) -> Iterable[bytes]:
         raise NotImplementedError
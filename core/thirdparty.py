@@ -1,5 +1,6 @@
+import os
 import textwrap
-from itertools import chain, pairwise
+from itertools import chain, pairwise, repeat, zip_longest
 from pathlib import Path
 from shlex import quote
 from typing import Iterable
@@ -127,8 +128,13 @@ def verilator_elaborate(c, top_module, verilog_src_file, target_dir, extra_args)
         insert_points = sorted(node.end_byte for node, _ in captures)
 
         # Insert all at once
+        # NOTE: memoryview slices avoid copying the source pieces; writelines() feeds them
+        # straight into the buffered writer without materializing the joined output first
+        view = memoryview(before)
+        remainders = (view[i:j] for i, j in pairwise(chain((0, ), insert_points, (len(before), ))))
+        insertions = repeat(comment, len(insert_points))
         with open(after, 'wb') as fp:
-            fp.write(comment.join(before[i:j] for i, j in pairwise(chain((0, ), insert_points, (len(before), )))))
+            fp.writelines(chain.from_iterable(zip_longest(remainders, insertions, fillvalue=b'')))
 
     origin_verilog = Path(verilog_src_file)
     commented_verilog = origin_verilog.with_stem('commented-' + origin_verilog.stem)
@@ -155,7 +161,8 @@ def verilator_elaborate(c, top_module, verilog_src_file, target_dir, extra_args)
 
 @task
 def semantic_check(c, src_file):
-    cmd = f'iverilog {src_file} && rm a.out' if src_file.endswith('.v') else _yosys_script_wrapper(
+    # NOTE: the "null" target skips code generation, so no a.out is produced (and none has to be removed)
+    cmd = f'iverilog -t null {src_file}' if src_file.endswith('.v') else _yosys_script_wrapper(
         f'plugin -i systemverilog; read_systemverilog -synth {src_file}')
     # NOTE: avoid raising UnexpectedExit when the executed command exits with a nonzero status (warn=True)
     try:
@@ -176,8 +183,10 @@ def verilator_compile(c, top_module, target_dir):
     makefile = f'V{top_module}.mk'
 
     # NOTE: disable ccache, otherwise wllvm will break down.
-    c.run(f'make -C {target_dir} -f {makefile} CXX=wllvm++ LINK=wllvm++',
-          env={'CCACHE_DISABLE': '1'},
+    # VM_PARALLEL_BUILDS makes the generated makefile compile split .cpp files in
+    # parallel even when Verilator itself did not decide to split the output.
+    c.run(f'make -C {target_dir} -f {makefile} -j {os.cpu_count()} CXX=wllvm++ LINK=wllvm++',
+          env={'CCACHE_DISABLE': '1', 'VM_PARALLEL_BUILDS': '1'},
           timeout=DEFAULT_TIMEOUT)
 
     with c.cd(target_dir):
@@ -9,15 +9,22 @@ from core.world import WorldMap
 
 class CmdlineOption:
 
+    # NOTE: translators declare options by the dozen; slots drop the per-instance
+    # __dict__ and make attribute access a fixed-offset load
+    __slots__ = ('template', 'domain', '_count')
+
     def __init__(self, template, domain=(None, )) -> None:
         self.template = template
-        self.domain = domain
+        # Materialize the domain once so that `range()` (or generator) domains
+        # are not re-enumerated on every sample() / count() call
+        self.domain = tuple(domain)
+        self._count = len(self.domain) + 1
 
     def sample(self) -> str:
         return self.template.format(choice(self.domain))
 
     def count(self) -> int:
-        return len(list(self.domain)) + 1
+        return self._count
 
 
 class MetaTranslator:
@@ -52,7 +59,11 @@ class MetaTranslator:
 
     @classmethod
     def instance_count(cls) -> int:
-        return reduce(mul, (op.count() for op in cls.alternative_options), 1)
+        # The options of a translator never change at runtime,
+        # so the product is computed at most once per subclass
+        if '_instance_count' not in cls.__dict__:
+            cls._instance_count = reduce(mul, (op.count() for op in cls.alternative_options), 1)
+        return cls._instance_count
 
 
 class Conversion:
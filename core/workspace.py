@@ -1,12 +1,28 @@
+import os
 import tempfile
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
 from datetime import datetime
 from pathlib import Path
-from shutil import copytree, ignore_patterns
+from shutil import copy2, copytree, ignore_patterns, rmtree
 
 from invoke.config import Config
 from invoke.context import Context
 
+# Removing a Verilator obj_dir with thousands of small files can dominate the tail
+# of a test case, so removals run on background threads. The executor's worker
+# threads are joined at interpreter exit, so no directory is left half-deleted.
+_CLEANUP_POOL = ThreadPoolExecutor(max_workers=2)
+
+
+def _link_or_copy(src, dst):
+    """Hardlink `src` into place; fall back to a real copy across filesystems."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        copy2(src, dst)
+
 
 class Workspace:
     """A valid Workspace object contains these items:
@@ -23,10 +39,16 @@ class Workspace:
 
     result_dir = Path(tempfile.gettempdir())
 
+    # The matcher is built once; ignore_patterns() would recompile its globs on every save
+    _IGNORE = staticmethod(ignore_patterns('test*', 'assembly.ll', 'run*stats'))
+
     def __enter__(self):
 
         # Create the temporary directory for current worker thread
-        self._tmpdir = tempfile.TemporaryDirectory(dir=self.__class__.result_dir)
+        self._tmpdir = tempfile.TemporaryDirectory(dir=self.__class__.result_dir, ignore_cleanup_errors=True)
+
+        # Next free suffix per requested name (see path_to_temp_dir / path_to_temp_file)
+        self._suffixes = dict()
 
         # Create the Context object used by invoke
         # NOTE: disable output of invoke tasks
@@ -40,8 +62,9 @@ class Workspace:
         return self
 
     def __exit__(self, exc, value, tb):
-        # Clean up the temporary directory
-        self._tmpdir.cleanup()
+        # Clean up the temporary directory off the critical path;
+        # the next test case starts without waiting for the removal
+        _CLEANUP_POOL.submit(rmtree, self._tmpdir.name, ignore_errors=True)
 
         # Remove itself from WORKSPACES_STACK
         pop_workspace()
@@ -57,9 +80,12 @@ class Workspace:
     def save_as(self, label: str) -> Path:
         """Copy all files except klee*/ in current directory to `{label}/`."""
 
+        # NOTE: hardlinks make the snapshot metadata-only; Verilator obj_dirs can
+        # hold hundreds of MB of build artifacts
         return copytree(src=self.tmpdir,
                         dst=self.__class__.result_dir / label / self._fresh_name(),
-                        ignore=ignore_patterns('test*', 'assembly.ll', 'run*stats'))
+                        ignore=self._IGNORE,
+                        copy_function=_link_or_copy)
 
     def path_to_temp_dir(self, dirname: str, unique=True) -> Path:
         """Get the absolute path to a subdirectory `dirname` under the `tmpdir` of current environment.
@@ -68,10 +94,13 @@ class Workspace:
         dirpath = self.tmpdir / dirname
 
         if unique:
-            suffix = 0
+            # NOTE: resume from the last handed-out suffix; restarting at 0 pays one
+            # stat() per existing sibling and turns repeated requests quadratic
+            suffix = self._suffixes.get(dirname, 0)
             while dirpath.exists():
                 dirpath = dirpath.with_name(dirname + str(suffix))
                 suffix += 1
+            self._suffixes[dirname] = suffix
 
         return dirpath
 
@@ -83,10 +112,11 @@ class Workspace:
 
         if unique:
             stem = filepath.stem
-            suffix = 0
+            suffix = self._suffixes.get(filename, 0)
             while filepath.exists():
                 filepath = filepath.with_stem(stem + str(suffix))
                 suffix += 1
+            self._suffixes[filename] = suffix
 
         elif filepath.is_dir():  # If filepath is already unique, it cannot be a directory.
             raise IsADirectoryError(f'file name "{filename}" conflicts with an existing directory.')
@@ -97,29 +127,42 @@ class Workspace:
         """Writes given `content` to a file named `filename` under the tmpdir.
         Returns the absolute path to the file."""
 
-        if isinstance(content, bytes):
-            content = content.decode()
-        elif not isinstance(content, str):
-            content = repr(content)
-
         filepath = self.path_to_temp_file(filename, unique)
-        filepath.write_text(content)
+
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            # NOTE: bytes go straight to disk in one syscall, bypassing Python's
+            # buffered IO layer (which would copy multi-MB payloads once more)
+            fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                view = memoryview(content)
+                while view:  # a regular-file write() is rarely partial, but may be
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd)
+        else:
+            if not isinstance(content, str):
+                content = repr(content)
+            filepath.write_text(content)
         return filepath
 
 
-WORKSPACES_STACK = []
+# NOTE: a ContextVar instead of a module-global list, so every thread (and asyncio
+# task) sees its own stack and parallel workers cannot pop each other's workspace
+_WORKSPACES_STACK: ContextVar[tuple] = ContextVar('workspaces_stack', default=())
 
 
 def get_workspace() -> Workspace:
     """Returns the `Workspace` at the top of the stack."""
-    return WORKSPACES_STACK[-1]
+    return _WORKSPACES_STACK.get()[-1]
 
 
 def push_workspace(workspace) -> None:
     """Push the given workspace onto the stack."""
-    WORKSPACES_STACK.append(workspace)
+    _WORKSPACES_STACK.set(_WORKSPACES_STACK.get() + (workspace, ))
 
 
 def pop_workspace() -> Workspace:
     """Pop a workspace from the stack."""
-    return WORKSPACES_STACK.pop()
+    *rest, top = _WORKSPACES_STACK.get()
+    _WORKSPACES_STACK.set(tuple(rest))
+    return top
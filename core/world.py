@@ -9,24 +9,35 @@ class WorldMap:
 
     __graph = nx.MultiDiGraph()
 
+    # Per-translator attributes, stored once per translator instead of once per edge
+    __translator_meta = dict()
+
+    # Memoized travel() results; valid as long as the graph does not change
+    __paths_cache = dict()
+
     @classmethod
     def draw(cls, translator):
-        instance_count = translator.instance_count()
+        cls.__translator_meta[translator] = {
+            'translator': translator.__name__,
+            'instance_count': translator.instance_count()
+        }
         for start, end in translator.edges:
-            cls.__graph.add_edge(start,
-                                 end,
-                                 key=translator,
-                                 translator=translator.__name__,
-                                 instance_count=instance_count)
+            cls.__graph.add_edge(start, end, key=translator)
+        cls.__paths_cache.clear()  # the new edges may open up new paths
 
     @classmethod
     def travel(cls, start: type, end: type):
         """Returns all the paths from start to end."""
 
-        sinks = (n for n in cls.__graph.nodes if issubclass(n, end))
-        return [[key for _, _, key in path] for path in nx.all_simple_edge_paths(cls.__graph, start, sinks)]
+        if (paths := cls.__paths_cache.get((start, end))) is None:
+            sinks = (n for n in cls.__graph.nodes if issubclass(n, end))
+            paths = cls.__paths_cache[(start, end)] = [
+                [key for _, _, key in path] for path in nx.all_simple_edge_paths(cls.__graph, start, sinks)
+            ]
+        return paths
 
     @classmethod
     def dump_edges(cls, fp: TextIO = sys.stdout) -> None:
-        fp.writelines(f'{u.__name__}-{data["translator"]}->{v.__name__}: {data["instance_count"]}\n'
-                      for u, v, data in cls.__graph.edges(data=True))
+        fp.writelines(f'{u.__name__}-{meta["translator"]}->{v.__name__}: {meta["instance_count"]}\n'
+                      for u, v, key in cls.__graph.edges(keys=True)
+                      if (meta := cls.__translator_meta[key]))
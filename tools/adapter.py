@@ -2,7 +2,6 @@
 
 import json
 import sys
-from pprint import pprint
 from shutil import copyfile
 
 strategy_file = sys.argv[1]
@@ -15,16 +14,14 @@ conversion_x = old['conversion_x']
 conversion_y = old['conversion_y']
 
 for c in (conversion_x, conversion_y):
-    for d in c['_translator_chain']['py/tuple']:
-        if 'py/id' in d.keys():
-            c['_translator_chain']['py/tuple'].remove(d)
-            c['_translator_chain']['py/tuple'].append({
-                "py/object": "core.translators.klee.KleeSymbolicExecution",
-                "policy": None
-            })
+    # NOTE: rebuild the chain in one pass; removing from the list while iterating
+    # it skipped the element after each removal
+    c['_translator_chain']['py/tuple'] = [{
+        "py/object": "core.translators.klee.KleeSymbolicExecution",
+        "policy": None
+    } if 'py/id' in d.keys() else d for d in c['_translator_chain']['py/tuple']]
 
 new = {'py/tuple': [conversion_x, conversion_y]}
-# pprint(new)
 
 with open(strategy_file, 'w') as fp:
     json.dump(new, fp)
@@ -1,13 +1,16 @@
 import json
 import logging
+import random
 import subprocess
+from glob import glob
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from itertools import product
-from os import environ, remove
+from os import environ, link, remove, rename, scandir
 from pathlib import Path
 from shlex import quote
-from shutil import copyfile, copytree, rmtree
+from shutil import copyfile, copytree, rmtree, which
 from typing import Literal, Optional
 
 import typer
@@ -19,6 +22,10 @@ app = typer.Typer()
 
 PREFIX = environ['HOME']
 
+# NOTE: pigz runs the gzip stage on all cores; tar's built-in single-threaded
+# gzip is the fallback when it is not installed
+TAR_COMPRESS = '--use-compress-program=pigz' if which('pigz') else '-z'
+
 logging.basicConfig(level=logging.INFO, format='%(message)s', handlers=[RichHandler()])
 
 
@@ -38,33 +45,42 @@ def timestamped_name(prefix: str, suffix: str) -> str:
     return '-'.join((prefix, datetime.today().strftime('%Y%m%d_%H%M%S_%f'), suffix))
 
 
-def upload_to_remote(source: str, hostname: str, destination: str):
-    """Copy the source file to the remote server."""
-    log_subprocess_output(['rsync', source, f'{hostname}:{destination}'], check=True)
+# NOTE: multiplex consecutive rsync/ssh invocations over one SSH connection per host;
+# without it every transfer pays a full TCP + SSH handshake
+SSH_MULTIPLEXING = 'ssh -o ControlMaster=auto -o ControlPath=/tmp/ssh-verixmith-%r@%h:%p -o ControlPersist=120s'
+
+
+def upload_to_remote(sources: str | list[str], hostname: str, destination: str):
+    """Copy the source file(s) to the remote server in one transfer."""
+    if isinstance(sources, str):
+        sources = [sources]
+    log_subprocess_output(['rsync', '-e', SSH_MULTIPLEXING, *sources, f'{hostname}:{destination}'], check=True)
 
 
 def pack_and_upload(dirpath: str, hostname: str, destination: str, archive_name: str = 'data.tar.gz') -> str:
-    """Create an archive from dirpath; then copy to remote destination.
+    """Stream an archive of dirpath to the remote destination.
     Return the destination path on the remote host."""
 
-    archive_path = Path(archive_name).absolute()
     input_dir_path = Path(dirpath).absolute()
-    log_subprocess_output(
-        ['tar', 'czf', archive_path.as_posix(), f'--directory={input_dir_path.as_posix()}', '.'],
-        cwd=input_dir_path.parent,
-        check=True)
-    logging.info(f'Packaged [{input_dir_path.as_posix()}] into [{archive_path.as_posix()}].')
-
-    upload_to_remote(archive_path.as_posix(), hostname, destination)
-    logging.info(f'Moved [{archive_path.as_posix()}] to [{hostname}:{destination}].')
-    remove(archive_path.as_posix())
+    remote_archive = (Path(destination) / archive_name).absolute().as_posix()
+
+    # NOTE: the archive lives only in the pipe buffers; writing it to disk first
+    # doubled the bytes written and serialized packing and uploading.
+    # pipefail propagates a tar failure through the pipeline's exit status.
+    log_subprocess_output([
+        'bash', '-o', 'pipefail', '-c',
+        f'tar {TAR_COMPRESS} -cf - --directory={quote(input_dir_path.as_posix())} . | '
+        f'ssh {hostname} "cat > {remote_archive}"'
+    ],
+                          check=True)
+    logging.info(f'Packaged [{input_dir_path.as_posix()}] into [{hostname}:{remote_archive}].')
 
-    return (Path(destination) / archive_name).absolute().as_posix()
+    return remote_archive
 
 
 def download_from_remote(hostname: str, source: str, destination: str):
     """Download the source file from the remote server."""
-    log_subprocess_output(['rsync', f'{hostname}:{source}', destination], check=True)
+    log_subprocess_output(['rsync', '-e', SSH_MULTIPLEXING, f'{hostname}:{source}', destination], check=True)
 
 
 def download_and_cleanup(hostname: str, source: str, destination: str):
@@ -77,6 +93,14 @@ def download_and_cleanup(hostname: str, source: str, destination: str):
         log_subprocess_output(f'ssh {hostname} rm {source}', shell=True)
 
 
+def link_or_copy(src, dst):
+    """Hardlink `src` into place; fall back to a real copy across filesystems."""
+    try:
+        link(src, dst)
+    except OSError:
+        copyfile(src, dst)
+
+
 def extract_input_and_strategy(parent_dir: str, input_filename: str, strategy_filename: str) -> str:
     """Extract the input & strategy files to a subdirectory under `parent_dir`.
     Return path to the directory holding extracted files."""
@@ -87,15 +111,18 @@ def extract_input_and_strategy(parent_dir: str, input_filename: str, strategy_fi
     regression_input_dir.mkdir()
 
     # Collect the (input, strategy) pairs
+    # NOTE: scandir's DirEntry caches the file type, and hardlinks avoid copying the
+    # data just before pack_and_upload tars it up anyway
     logging.info(f'Collecting the (input, strategy) pairs to [{regression_input_dir.as_posix()}]...')
     index = 1
-    for case_dir in (d for d in Path(parent_dir).iterdir() if d.is_dir()):
-        input_file = case_dir / input_filename
-        strategy_file = case_dir / strategy_filename
-        if input_file.exists() and strategy_file.exists():
-            copyfile(input_file, regression_input_dir / (f'input{index:0>6}' + input_file.suffix))
-            copyfile(strategy_file, regression_input_dir / (f'strategy{index:0>6}' + strategy_file.suffix))
-            index += 1
+    with scandir(parent_dir) as entries:
+        for case_dir in (Path(e.path) for e in entries if e.is_dir(follow_symlinks=False)):
+            input_file = case_dir / input_filename
+            strategy_file = case_dir / strategy_filename
+            if input_file.exists() and strategy_file.exists():
+                link_or_copy(input_file, regression_input_dir / (f'input{index:0>6}' + input_file.suffix))
+                link_or_copy(strategy_file, regression_input_dir / (f'strategy{index:0>6}' + strategy_file.suffix))
+                index += 1
 
     return regression_input_dir.absolute().as_posix()
 
@@ -155,27 +182,32 @@ class Configuration:
         return [Configuration(m, v, c) for m, v, c in product(d['Mutants'], d['Validations'], d['Completeness'])]
 
     def runner_maker(self, input_set_name: str, dirpath: str, size: int, timeout: str = '0'):
-
-        def runner(result_path, n_jobs, n_cpus, hostname):
-            if input_set_name.startswith('Verilog'):
-                source_node = 'VerilogCircuit'
-                sink_node = 'SmtCircuit'
-                input_suffix = '.v'
-            elif input_set_name.startswith('SystemVerilog'):
-                source_node = 'SystemVerilogCircuit'
-                sink_node = 'VerilogCircuit'
-                input_suffix = '.sv'
-            else:
-                raise NotImplementedError
-
-            identifier = f'{input_set_name}-{self.mutants}-{self.validations}-{self.completeness}'
-
-            # NOTE: Expected structure of this result path:
-            # result-path/
-            #   [input-set]-[n]x[n]/
-            #   *-results/ (or *-results.tar.gz)
-            #   *-mutants/ (or *-mutants.tar.gz)
-
+        """Returns a (prepare, test) pair of callables for this configuration.
+
+        `prepare` slices the seeds and generates the mutants; `test` runs the batch
+        test on the prepared inputs. The split lets the caller overlap one
+        configuration's tests with the next configuration's preparation."""
+
+        if input_set_name.startswith('Verilog'):
+            source_node = 'VerilogCircuit'
+            sink_node = 'SmtCircuit'
+            input_suffix = '.v'
+        elif input_set_name.startswith('SystemVerilog'):
+            source_node = 'SystemVerilogCircuit'
+            sink_node = 'VerilogCircuit'
+            input_suffix = '.sv'
+        else:
+            raise NotImplementedError
+
+        identifier = f'{input_set_name}-{self.mutants}-{self.validations}-{self.completeness}'
+
+        # NOTE: Expected structure of this result path:
+        # result-path/
+        #   [input-set]-[n]x[n]/
+        #   *-results/ (or *-results.tar.gz)
+        #   *-mutants/ (or *-mutants.tar.gz)
+
+        def prepare(result_path, n_jobs, n_cpus, hostname):
             seed_dir = result_path / f'{input_set_name}-{size}x1'
             input_dir = result_path / f'{input_set_name}-{size}x{self.mutants + 1}'
 
@@ -183,8 +215,9 @@ class Configuration:
             if not seed_dir.exists():
                 test_case_slicer(f'{dirpath}/*{input_suffix}', 1, size, seed_dir.as_posix(), shuffle=True)
             if not input_dir.exists():
-                # Copy seeds from seed_dir
-                copytree(seed_dir, input_dir)
+                # Hardlink seeds from seed_dir; mutants are written as new files
+                # later, so the input set costs no extra disk space
+                copytree(seed_dir, input_dir, copy_function=link_or_copy)
 
                 mutate(identifier,
                        seed_dir.as_posix(),
@@ -195,15 +228,20 @@ class Configuration:
                        hostname=hostname)
 
                 if hostname:
-                    merge_mutants = f'ls {result_path.as_posix()}/"{identifier}"-*-mutants.tar.gz | \
-                    sort -r | head -n 1 | \
-                    xargs -I _ tar -xmf _ --directory {input_dir} --wildcards "*{input_suffix}" --warning no-timestamp'
-
+                    # The timestamp in the archive name sorts, so the last one is the newest
+                    archive = sorted(result_path.glob(f'{identifier}-*-mutants.tar.gz'), reverse=True)[0]
+                    log_subprocess_output([
+                        'tar', '-xmf',
+                        archive.as_posix(), '--directory',
+                        input_dir.as_posix(), '--wildcards', f'*{input_suffix}', '--warning', 'no-timestamp'
+                    ],
+                                          check=True)
                 else:
-                    merge_mutants = f'mv {result_path.as_posix()}/"{identifier}"-*-mutants/*{input_suffix} \
-                        {input_dir.as_posix()}'
+                    for mutant in result_path.glob(f'{identifier}-*-mutants/*{input_suffix}'):
+                        rename(mutant, input_dir / mutant.name)
 
-                log_subprocess_output(merge_mutants, shell=True, check=True)
+        def test(result_path, n_jobs, n_cpus, hostname):
+            input_dir = result_path / f'{input_set_name}-{size}x{self.mutants + 1}'
 
             if not list(result_path.glob(identifier + '-*-results' + '.tar.gz' if hostname else '')):
                 batch_test(identifier,
@@ -218,7 +256,7 @@ class Configuration:
                            quick=not self.completeness,
                            hostname=hostname)
 
-        return runner
+        return prepare, test
 
 
 @app.command()
@@ -233,27 +271,30 @@ def verismith_generate(
         max_loc: Annotated[int, typer.Option(help='Max lines of generated program')] = 200):
     """Generate a package of the Verilog data."""
 
-    config_path = Path(config_file)
-    script_path = Path(script_file)
+    # Resolve each mount path once; .absolute() rebuilds the Path (and calls getcwd)
+    # on every use
+    config_path = Path(config_file).absolute()
+    script_path = Path(script_file).absolute()
 
-    result_path = Path(output_dir)
+    result_path = Path(output_dir).absolute()
     result_path.mkdir(parents=True)
+    result_dir = result_path.as_posix()
 
     log_subprocess_output(f'docker run -ti --rm \
-        --mount type=bind,source={config_path.absolute().as_posix()},target=/app/verismith/{config_path.name} \
-        --mount type=bind,source={script_path.absolute().as_posix()},target=/app/verismith/{script_path.name} \
-        --mount type=bind,source={result_path.absolute().as_posix()},target=/app/verismith/{result_path.name} \
+        --mount type=bind,source={config_path.as_posix()},target=/app/verismith/{config_path.name} \
+        --mount type=bind,source={script_path.as_posix()},target=/app/verismith/{script_path.name} \
+        --mount type=bind,source={result_dir},target=/app/verismith/{result_path.name} \
         --entrypoint bash \
         verismith verismith_task.sh {size} {config_path.name} {result_path.name} {max_loc}',
                           shell=True,
                           check=True)
 
     # Change the owner of files generated in Docker container
-    log_subprocess_output(['sudo', 'chown', '-R', 'zyk:zyk', result_path.as_posix()])
+    log_subprocess_output(['sudo', 'chown', '-R', 'zyk:zyk', result_dir])
 
     if output_ar:
-        log_subprocess_output(['tar', 'czf', output_ar, f'--directory={result_path.as_posix()}', '.'])
-        rmtree(result_path.as_posix())
+        log_subprocess_output(['tar', TAR_COMPRESS, '-cf', output_ar, f'--directory={result_dir}', '.'])
+        rmtree(result_dir)
 
 
 @app.command()
@@ -270,11 +311,14 @@ def test_case_slicer(pattern: str, start: int, end: int, output_dir: str, shuffl
 
     output_path = Path(output_dir)
     output_path.mkdir(parents=True)
-    log_subprocess_output(f'ls -1 {pattern}{" | shuf" if shuffle else ""} \
-            | head -n {end} | tail -n {end - start + 1} \
-            | xargs -I _ cp _ {quote(output_path.as_posix())}',
-                          shell=True,
-                          check=True)
+
+    # NOTE: the former ls|shuf|head|tail|xargs cp pipeline forked six processes and
+    # copied the file data; globbing in-process and hardlinking does neither
+    files = sorted(glob(pattern))
+    if shuffle:
+        random.shuffle(files)
+    for filepath in files[start - 1:end]:
+        link_or_copy(filepath, output_path / Path(filepath).name)
 
 
 def deploy_helper(input_dir: str, output_dir: str, output_identifier: str, hostname: str | None) -> tuple[str, str]:
@@ -396,21 +440,41 @@ def analyze(filepath: Annotated[str, typer.Argument(help='Path to the JSON file
     _result_path = Path(result_path).absolute()
     _result_path.mkdir(parents=True)
 
-    tasks = json.load(open(filepath))
+    with open(filepath) as fp:
+        tasks = json.load(fp)
 
     with Progress() as progress:
-        input_sets = tasks['InputSets']
+        input_sets = tuple(tasks['InputSets'].items())
         configs = Configuration.from_dict(tasks['Configurations'])
 
         per_input_set = progress.add_task("[cyan]InputSets", total=len(input_sets))
         per_config = progress.add_task("[green]Configurations", total=len(configs))
 
-        for name, info in input_sets.items():
-            progress.update(per_config, completed=0)
-            for config in configs:
-                config.runner_maker(name, **info)(_result_path, n_jobs, n_cpus, hostname)
+        jobs = [(name, *config.runner_maker(name, **info)) for name, info in input_sets for config in configs]
+        args = (_result_path, n_jobs, n_cpus, hostname)
+
+        # NOTE: pipeline the phases: while this thread runs one configuration's tests,
+        # the single background worker prepares the next configuration's inputs.
+        # One worker is deliberate — prepare steps share the per-input-set seed dirs.
+        current_set = None
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            prepared = prefetcher.submit(jobs[0][1], *args) if jobs else None
+            for index, (name, _, test) in enumerate(jobs):
+                if name != current_set:
+                    if current_set is not None:
+                        progress.update(per_input_set, advance=1)
+                    progress.update(per_config, completed=0)
+                    current_set = name
+
+                prepared.result()  # wait until this configuration's inputs are ready
+                if index + 1 < len(jobs):
+                    prepared = prefetcher.submit(jobs[index + 1][1], *args)
+
+                test(*args)
                 progress.update(per_config, advance=1)
-            progress.update(per_input_set, advance=1)
+
+            if current_set is not None:
+                progress.update(per_input_set, advance=1)
 
 
 @app.command()
@@ -433,10 +497,15 @@ def update_image(hosts: Annotated[Optional[list[str]],
         logging.info(f'Saving the image to {archive_file}...')
         log_subprocess_output(f'docker save verixmith:latest | gzip > {archive_file}', shell=True)
 
-        for hostname in hosts:
+        def push_image(hostname: str):
             upload_to_remote(archive_file, hostname, f'{PREFIX}/')
             log_subprocess_output(f'ssh {hostname} docker load < {archive_file}', shell=True)
 
+        # NOTE: each host only spawns rsync/ssh subprocesses (the GIL is released while
+        # waiting on them), so all transfers and remote "docker load"s run concurrently
+        with ThreadPoolExecutor(max_workers=min(len(hosts), 16)) as executor:
+            list(executor.map(push_image, hosts))
+
         remove(archive_file)
 
 
@@ -2,14 +2,17 @@ import csv
 import json
 import logging
 import os
+import re
 import subprocess
+from ast import literal_eval
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from functools import reduce
+from functools import lru_cache, reduce
 from itertools import chain, product
-from operator import add, and_, or_
+from operator import and_, or_
 from pathlib import Path
-from shutil import move, rmtree
+from shutil import move, rmtree, which
 
 import typer
 from rich.logging import RichHandler
@@ -20,15 +23,24 @@ logging.basicConfig(level=logging.WARNING, format='%(message)s', handlers=[RichH
 
 
 def iterate_subdirs(parent_dir: Path):
-    yield from (p for p in parent_dir.iterdir() if p.is_dir())
+    # DirEntry.is_dir() reuses the type reported by the directory read,
+    # so large parent dirs are scanned without a stat per entry
+    with os.scandir(parent_dir) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield Path(entry.path)
 
 
-def inspect_subdir(dirpath: Path, trait: dict[str, list]) -> bool:
+def inspect_subdir(dirpath: Path, predicates: dict) -> bool:
+    # NOTE: an explicit loop short-circuits; reduce(and_, ...) would keep
+    # reading the remaining files after a predicate has already failed
     try:
-        return reduce(and_, (predicate_maker(expressions)((dirpath / filename).read_text())
-                             for filename, expressions in trait.items()), True)
+        for filename, predicate in predicates.items():
+            if not predicate((dirpath / filename).read_text()):
+                return False
     except FileNotFoundError:
         return False
+    return True
 
 
 def predicate_maker(expressions):
@@ -52,8 +64,11 @@ def predicate_maker(expressions):
     return predicate
 
 
+@lru_cache(maxsize=32)
 def load_filter(filepath: str) -> dict:
-    return json.load(open(filepath))
+    # Parsed once per path; the cached dict is shared, so callers must not mutate it
+    with open(filepath) as fp:
+        return json.load(fp)
 
 
 def extract_datetime(dirname: str) -> datetime:
@@ -63,18 +78,16 @@ def extract_datetime(dirname: str) -> datetime:
 def apply_filter(parent_dir: Path, patterns: dict) -> list[datetime]:
     first_occurrences = list()
     for name, spec in patterns.items():
-        trait = spec.pop('__trait')
-        apply_trait(parent_dir, name, trait)
+        apply_trait(parent_dir, name, spec['__trait'])
 
         child_dir = parent_dir / name
 
-        ignore = spec.pop('__ignore', False)
-        if ignore:
+        if spec.get('__ignore', False):
             rmtree(child_dir)
         elif not os.listdir(child_dir):
             os.rmdir(child_dir)
-        elif spec:
-            if sub_categories := apply_filter(child_dir, spec):
+        elif sub_patterns := {key: value for key, value in spec.items() if not key.startswith('__')}:
+            if sub_categories := apply_filter(child_dir, sub_patterns):
                 first_occurrences.extend(sub_categories)
             else:
                 logging.warning(f'Failed to match any sub-category in {name}.')
@@ -96,42 +109,59 @@ def apply_trait(parent_dir: Path, category: str, trait: dict):
     target_dir = parent_dir / category
     target_dir.mkdir(parents=True, exist_ok=True)
 
-    for subdir in iterate_subdirs(parent_dir):
-        if (not subdir.samefile(target_dir)) and inspect_subdir(subdir, trait):
+    # Compile each trait expression once instead of per inspected subdir
+    predicates = {filename: predicate_maker(expressions) for filename, expressions in trait.items()}
+
+    # DirEntry.is_dir() reuses the type reported by the directory read, and comparing
+    # paths as strings spares the stat pair samefile() would issue per entry
+    target_path = str(target_dir)
+    with os.scandir(parent_dir) as entries:
+        subdirs = [Path(e.path) for e in entries if e.is_dir(follow_symlinks=False) and e.path != target_path]
+
+    # Inspections are pure reads (the GIL is released during file I/O), so they run
+    # concurrently; the cheap renames stay serial afterwards
+    matches = []
+    if subdirs:
+        with ThreadPoolExecutor(max_workers=min(32, len(subdirs))) as executor:
+            verdicts = executor.map(lambda subdir: inspect_subdir(subdir, predicates), subdirs)
+            matches = [subdir for subdir, matched in zip(subdirs, verdicts) if matched]
+
+    # A move within one filesystem is a plain rename; shutil.move falls back to copy+delete
+    same_device = os.stat(parent_dir).st_dev == os.stat(target_dir).st_dev
+
+    for subdir in matches:
+        if same_device:
+            os.rename(subdir, target_dir / subdir.name)
+        else:
             move(subdir, target_dir)
 
 
 TRANSFORMERS = ('SurelogPlugin', 'SystemVerilogToVerilog', 'VerilatorTransformer', 'YosysWriteSmt2', 'YosysWriteCxx')
 
-
-def get_transformer_and_args(line: str) -> tuple[str | None, tuple[str, ...]]:
-
-    def get_extra_args(dict_str: str) -> tuple[str, ...]:
-        return eval(dict_str)['extra_args']
-
-    for t in TRANSFORMERS:
-        if (start := line.find(t + '(')) > 0:
-            if t == 'YosysWriteSmt2':
-                return t, tuple()
-            line = line[start + len(t) + 1:]
-            if (end := line.find('})')) > 0:
-                return t, get_extra_args(line[:end + 1])
-    return None, tuple()  # No transformer found
+# A single compiled scan over the line replaces one str.find per transformer name
+TRANSFORMER_RE = re.compile('(' + '|'.join(TRANSFORMERS) + r')\((\{[^}]*\})?')
 
 
 def get_equivalence_classes(dirpath: Path) -> list[dict[str, list[tuple[str, ...]]]]:
     classes = list()
     try:
-        with open(dirpath / 'equivalence_classes', 'r') as fp:
+        with open(dirpath / 'equivalence_classes', 'r', buffering=1 << 16) as fp:
             current_class = None
-            for line in fp.readlines():
+            for line in fp:
                 if 'core.circuits' in line:  # New equivalence class
                     if current_class:
                         classes.append(current_class)
                     current_class = defaultdict(list)
-                t, args = get_transformer_and_args(line)
-                if t:
-                    current_class[t].append(args)
+                # NOTE: at most one record per line — a line holds one Conversion
+                # chain and counting each call would inflate the class sizes
+                if match := TRANSFORMER_RE.search(line):
+                    transformer, policy = match.groups()
+                    if transformer == 'YosysWriteSmt2':
+                        current_class[transformer].append(tuple())
+                    elif policy:
+                        # The policy is a plain dict literal, so literal_eval parses
+                        # it without the cost (and risk) of eval
+                        current_class[transformer].append(literal_eval(policy)['extra_args'])
             if current_class:
                 classes.append(current_class)
 
@@ -148,13 +178,18 @@ def diff_classifier(parent_dir: Path) -> int:
             prime_category = sub_category = None
 
             # Prime: use the correlated transformers
+            # NOTE: a transformer in several classes is deliberately repeated, so
+            # "X-X" (X on both sides) stays distinct from a single-class "X"
             prime_category = '-'.join(sorted(chain(*(c.keys() for c in classes))))
 
             # Sub: minority transformer type
             if len(classes) == 2 and len(classes[0]) == 1 and len(classes[1]) == 1:
                 sub_category = prime_category
             else:
-                minority = sorted(classes, key=lambda c: reduce(add, (len(i) for i in c.values())))[0]
+                # A keyed min computes each class size once; sorting re-ran the sum
+                # on every comparison just to take the first element
+                sizes = [sum(map(len, c.values())) for c in classes]
+                minority = classes[min(range(len(classes)), key=sizes.__getitem__)]
                 if len(minority) > 1:
                     sub_category = '-'.join(sorted(minority.keys()))
                 else:
@@ -176,12 +211,23 @@ def diff_classifier(parent_dir: Path) -> int:
     return len(category_count)
 
 
-def result_dirs_in(parent_dir: Path, tasks: dict) -> list[tuple[Path, str, int, int, bool]]:
+# Parses "[input-set]-[mutants]-[validations]-[completeness]-[timestamp]-results"
+RESULT_DIR_RE = re.compile(r'(?P<name>.+?)-(?P<m>\d+)-(?P<v>\d+)-(?P<c>True|False)-.+-results')
+
+
+def result_dirs_in(parent_dir: Path, input_sets: tuple,
+                   config_product: list[tuple]) -> list[tuple[Path, str, int, int, bool]]:
+    # One scan indexes every result dir; globbing walked the whole parent dir
+    # once per (name, m, v, c) combination
+    by_config = defaultdict(list)
+    for subdir in iterate_subdirs(parent_dir):
+        if match := RESULT_DIR_RE.fullmatch(subdir.name):
+            by_config[match.group('name', 'm', 'v', 'c')].append(subdir)
+
     results = list()
-    for name in tasks['InputSets']:
-        for m, v, c in product(tasks['Configurations']['Mutants'], tasks['Configurations']['Validations'],
-                               tasks['Configurations']['Completeness']):
-            result_dir = list(parent_dir.glob(f'{name}-{m}-{v}-{c}-*-results/'))
+    for name in input_sets:
+        for m, v, c in config_product:
+            result_dir = by_config[(name, str(m), str(v), str(c))]
             assert len(result_dir) == 1
             results.append((result_dir[0], name, m, v, c))
     return sorted(results)
@@ -197,18 +243,29 @@ def sort(parent_dir: str, config_file: str):
 def count(tasks_file: str, parent_dir: str, output_csv: str):
 
     parent_path = Path(parent_dir)
-    # Unzip *-results.tar.gz files
+    # Unzip *-results.tar.gz files; pigz decompresses in parallel when installed
+    decompress = '--use-compress-program=pigz' if which('pigz') else '-z'
     for ar in parent_path.glob('*-results.tar.gz'):
         target_dir = ar.with_name(ar.name.strip('.tar.gz'))
         if target_dir.exists() and target_dir.is_dir():
             rmtree(target_dir)
         target_dir.mkdir()
-        subprocess.run(['tar', 'xf', ar.as_posix(), f'--directory={target_dir.as_posix()}', '--warning=no-timestamp'])
+        subprocess.run(
+            ['tar', decompress, '-xf',
+             ar.as_posix(), f'--directory={target_dir.as_posix()}', '--warning=no-timestamp'])
 
     data = list()
     data.append(['InputSets', 'Mutants', 'Validations', 'Completeness', 'Crashes', 'Differences'])
 
-    for result_dir, name, m, v, c in result_dirs_in(parent_path, json.load(open(tasks_file))):
+    # The tasks JSON is parsed once and the configuration product is built up
+    # front instead of per input set
+    with open(tasks_file) as fp:
+        tasks = json.load(fp)
+    config_product = list(
+        product(tasks['Configurations']['Mutants'], tasks['Configurations']['Validations'],
+                tasks['Configurations']['Completeness']))
+
+    for result_dir, name, m, v, c in result_dirs_in(parent_path, tuple(tasks['InputSets']), config_product):
 
         unique_crashes = len(apply_filter(result_dir / 'crashes', load_filter('tools/triage/crash_filter.json')))
         logging.info(f'Detected {unique_crashes} unique crash(es) in {result_dir.as_posix()}.')
@@ -225,8 +282,8 @@ def count(tasks_file: str, parent_dir: str, output_csv: str):
 
         data.append([name, m, v, c, unique_crashes, unique_differences])
 
-    writer = csv.writer(open(output_csv, 'w'))
-    writer.writerows(data)
+    with open(output_csv, 'w', newline='', buffering=1 << 16) as fp:
+        csv.writer(fp).writerows(data)
 
 
 if __name__ == '__main__':